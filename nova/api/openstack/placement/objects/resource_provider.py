@@ -2434,7 +2434,7 @@ class ResourceClassList(base.ObjectListBase, base.VersionedObject):
     def _get_all(context):
         _ensure_rc_cache(context)
         customs = list(context.session.query(models.ResourceClass).all())
-        return _RC_CACHE.STANDARDS + customs
+        return list(_RC_CACHE.STANDARDS) + customs
 
     @classmethod
     def get_all(cls, context):
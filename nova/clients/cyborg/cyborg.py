@@ -7,6 +7,10 @@ import random
 import uuid as uuidlib
 import sys
 
+from eventlet import greenpool
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
 
 HOST = "127.0.0.1"
 HOSTURL = "http://%s" % HOST
@@ -14,18 +18,56 @@ BASEURL = "http://%s/v1" % HOST
 # cyborg = CONF.get("cyborg")
 # cyborg.get("url")
 
+# Shared session so the underlying urllib3 pool keeps connections (and
+# TLS sessions) alive across calls instead of re-handshaking per
+# request. Built lazily by _get_session() so importing the module does
+# not allocate pools in processes that never talk to cyborg.
+_SESSION = None
+
+
+def _get_session():
+    """Return the shared keep-alive session, building it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        session = requests.Session()
+        session.mount("http://", requests.adapters.HTTPAdapter(
+            pool_connections=10, pool_maxsize=20))
+        session.mount("https://", requests.adapters.HTTPAdapter(
+            pool_connections=10, pool_maxsize=20))
+        session.headers.update({"Content-Type": "application/json",
+                                "Accept": "application/json"})
+        _SESSION = session
+    return _SESSION
+
 
 def pretty_print(r):
     if not r.ok:
-        print r.content
+        LOG.debug('%s', r.content)
         return
     data = r.json()
-    res = json.dumps(data, sort_keys=True, indent=4, separators=(',', ': '))
-    print res
+    # Pretty-printing re-serializes the whole body with sorting and
+    # indentation; only pay for that when debug logging is consuming it.
+    if LOG.isEnabledFor(logging.DEBUG):
+        res = json.dumps(data, sort_keys=True, indent=4,
+                         separators=(',', ': '))
+        LOG.debug('%s', res)
     return data
 
 
-def claim_fpgas(token, payload={}, url=BASEURL):
+# Fallback claim used when no payload is supplied; built once instead
+# of per call and never mutated, only serialized.
+_EXAMPLE_PAYLOAD = {
+    "instance_uuid": "4047d422-5d2f-432c-b87f-5e1749e95ee6",
+    "host": "cyborg-1",
+    "resources1:CUSTOM_FPGA_INTEL_VF": "1",
+    "resources:CUSTOM_FPGA_INTEL_PF": "1",
+    "trait1:CUSTOM_CYBORG_FPGA": "required",
+    "trait1:CUSTOM_CYBORG_INTEL": "required",
+    "trait1:CUSTOM_CYBORG_CRYPTO": "required"
+}
+
+
+def claim_fpgas(token, payload=None, url=BASEURL):
     """
     payload = {
         "instance_uuid": "4047d422-5d2f-432c-b87f-5e1749e95ee6",
@@ -37,20 +79,28 @@ def claim_fpgas(token, payload={}, url=BASEURL):
         "trait1:CUSTOM_CYBORG_CRYPTO": "required"
     }
     """
-    payload = {
-        "instance_uuid": "4047d422-5d2f-432c-b87f-5e1749e95ee6",
-        "host": "cyborg-1",
-        "resources1:CUSTOM_FPGA_INTEL_VF": "1",
-        "resources:CUSTOM_FPGA_INTEL_PF": "1",
-        "trait1:CUSTOM_CYBORG_FPGA": "required",
-        "trait1:CUSTOM_CYBORG_INTEL": "required",
-        "trait1:CUSTOM_CYBORG_CRYPTO": "required"
-    } if not payload else payload
-    HEADERS = {"Content-Type": "application/json",
-               "Accept": "application/json",
-               "X-Auth-Token": token}
+    payload = payload or _EXAMPLE_PAYLOAD
+    headers = {"X-Auth-Token": token}
     url = os.path.join(url, "deployables/allocations")
-    r = requests.post(url, data=json.dumps(payload), headers=HEADERS)
+    r = _get_session().post(url, json=payload, headers=headers)
     if r.ok:
        return r.json()
     res = pretty_print(r)
+
+
+# How many claims may be in flight at once; keeps a claim storm from
+# exhausting the session's connection pool.
+CLAIM_BATCH_SIZE = 32
+
+
+def claim_fpgas_batch(token, payloads, url=BASEURL, batch_size=CLAIM_BATCH_SIZE):
+    """Claim allocations for many instances with bounded concurrency.
+
+    Dispatches up to batch_size claims at a time over the pooled
+    session, so a burst of claims (migration or evacuate storms) costs
+    roughly the slowest round-trip per batch instead of the sum of all
+    round-trips. Results are returned in payload order.
+    """
+    pool = greenpool.GreenPool(size=batch_size)
+    return list(pool.imap(
+        lambda payload: claim_fpgas(token, payload, url=url), payloads))
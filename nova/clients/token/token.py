@@ -1,57 +1,124 @@
 #!/usr/bin/python
+import datetime
+
 import requests
 import json
 import os
+import time
+
+from oslo_utils import timeutils
 
 from nova.conf import CONF
 
 
-SC = CONF.get("keystone_authtoken")
-SC.get("username")
-
-# import pdb; pdb.set_trace()
-CAFILE = SC.get("cafile") if SC else None
-OS_USERNAME = SC.get("username") if SC else None
-OS_PASSWORD = SC.get("password") if SC else None
-OS_PROJECT_NAME = SC.get("project_name") if SC else None
-OS_AUTH_URL = SC.get("auth_url") if SC else None
-OS_AUTH_TYPE = SC.get("auth_type") if SC else "password"
-
-OS_PROJECT_DOMAIN_ID = SC.get("project_domain_name") if SC else "Default"
-OS_USER_DOMAIN_ID = SC.get("user_domain_name") if SC else "Default"
-# OS_REGION_NAME =  SC.get("region_name") if SC else "RegionOne"
-
-# NOTE hardcode.
-TOKEN_URL = os.path.join(OS_AUTH_URL, "v3/auth/tokens")
-SERVICES_URL = os.path.join(OS_AUTH_URL, "v3/services")
-ENDPOINTS_URL = os.path.join(OS_AUTH_URL, "v3/endpoints")
-
-AUTH_BODY = {
-    "auth": {
-        "identity": {
-            "methods": [
-                OS_AUTH_TYPE
-            ],
-            "password": {
-                "user": {
-                    "name": OS_USERNAME,
-                    "domain": {
-                        "name": OS_USER_DOMAIN_ID
-                    },
-                    "password": OS_PASSWORD
+# Shared session so the underlying urllib3 pool keeps connections (and
+# TLS sessions) alive across calls instead of re-handshaking per
+# request. Built lazily by _get_session() so importing the module does
+# not allocate pools in processes that never talk to keystone.
+_SESSION = None
+
+
+def _get_session():
+    """Return the shared keep-alive session, building it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        session = requests.Session()
+        session.mount("http://", requests.adapters.HTTPAdapter(
+            pool_connections=10, pool_maxsize=20))
+        session.mount("https://", requests.adapters.HTTPAdapter(
+            pool_connections=10, pool_maxsize=20))
+        session.headers.update({"Content-Type": "application/json",
+                                "Accept": "application/json"})
+        _SESSION = session
+    return _SESSION
+
+
+# Auth settings built from CONF on first use. Reading CONF at import
+# time forced option parsing before nova had registered everything, and
+# a missing [keystone_authtoken]/auth_url made os.path.join(None, ...)
+# raise at import, killing the whole process.
+_AUTH_CACHE = {}
+
+
+def _get_auth():
+    """Return the cached auth settings dict, building it on first use."""
+    if _AUTH_CACHE:
+        return _AUTH_CACHE
+
+    sc = CONF.get("keystone_authtoken")
+    username = sc.get("username") if sc else None
+    password = sc.get("password") if sc else None
+    project_name = sc.get("project_name") if sc else None
+    auth_url = sc.get("auth_url") if sc else None
+    auth_type = sc.get("auth_type") if sc else "password"
+    project_domain = sc.get("project_domain_name") if sc else "Default"
+    user_domain = sc.get("user_domain_name") if sc else "Default"
+    # region_name = sc.get("region_name") if sc else "RegionOne"
+
+    # NOTE hardcode.
+    _AUTH_CACHE.update(
+        cafile=sc.get("cafile") if sc else None,
+        token_url=os.path.join(auth_url, "v3/auth/tokens")
+        if auth_url else None,
+        services_url=os.path.join(auth_url, "v3/services")
+        if auth_url else None,
+        endpoints_url=os.path.join(auth_url, "v3/endpoints")
+        if auth_url else None,
+        auth_body={
+            "auth": {
+                "identity": {
+                    "methods": [
+                        auth_type
+                    ],
+                    "password": {
+                        "user": {
+                            "name": username,
+                            "domain": {
+                                "name": user_domain
+                            },
+                            "password": password
+                        }
+                    }
+                },
+                "scope": {
+                    "project": {
+                        "name": project_name,
+                        "domain": {
+                            "name": project_domain
+                        }
+                    }
                 }
             }
-        },
-        "scope": {
-            "project": {
-                "name": OS_PROJECT_NAME,
-               "domain": {
-                   "name": OS_PROJECT_DOMAIN_ID
-               }
-            }
-        }
-    }
-}
+        })
+    return _AUTH_CACHE
+
+
+# In-process caches. A keystone token is valid for hours and the
+# service catalog rarely changes, so neither is worth an HTTP
+# round-trip per call.
+_TOKEN_CACHE = {"token": None, "data": None, "expires": None}
+_TOKEN_EXPIRY_MARGIN = datetime.timedelta(seconds=60)
+# Endpoint URLs are effectively static configuration, but operators do
+# occasionally move them; refresh a cached entry after _ENDPOINT_TTL
+# seconds so staleness stays bounded. Values are (cached_at, url).
+_ENDPOINT_TTL = 600
+_ENDPOINT_CACHE = {}
+
+
+def invalidate(service=None):
+    """Drop cached auth and endpoint state.
+
+    Lets operators (or a SIGHUP handler) force a refetch after rotating
+    credentials or moving an endpoint, instead of waiting out the TTL.
+    With a service name only that endpoint entry is dropped; without
+    one, the endpoint, token and auth-settings caches are all cleared.
+    """
+    if service is not None:
+        _ENDPOINT_CACHE.pop(service, None)
+        return
+    _ENDPOINT_CACHE.clear()
+    _TOKEN_CACHE.update(token=None, data=None, expires=None)
+    _AUTH_CACHE.clear()
 
 
 def get_token():
@@ -60,20 +127,37 @@ def get_token():
         project_id = data["token"]["project"]["id"]
         user_id = data["token"]["user"]["id"]
     """
-    headers = {"Content-Type": "application/json"}
+    expires = _TOKEN_CACHE["expires"]
+    if (expires and
+            timeutils.utcnow(with_timezone=True) <
+            expires - _TOKEN_EXPIRY_MARGIN):
+        return _TOKEN_CACHE["token"], _TOKEN_CACHE["data"]
+
+    auth = _get_auth()
     # import pdb; pdb.set_trace()
-    r = requests.post(TOKEN_URL, data=json.dumps(AUTH_BODY), headers=headers)
+    r = _get_session().post(auth["token_url"], data=json.dumps(auth["auth_body"]))
     if r.ok:
         data = r.json()
         # print json.dumps(data, sort_keys=True, indent=4, separators=(',', ': '))
-        return r.headers['X-Subject-Token'], data
+        token = r.headers['X-Subject-Token']
+        try:
+            expires = timeutils.parse_isotime(data["token"]["expires_at"])
+        except (KeyError, TypeError, ValueError):
+            expires = None
+        _TOKEN_CACHE.update(token=token, data=data, expires=expires)
+        return token, data
     return None, {}
 
 
 def get_service_url(token, service):
-    headers = {"Content-Type": "application/json",
-               "X-Auth-Token": token}
-    r = requests.get(SERVICES_URL, headers=headers, params={"type": service})
+    cached = _ENDPOINT_CACHE.get(service)
+    if cached and time.time() - cached[0] < _ENDPOINT_TTL:
+        return cached[1]
+
+    auth = _get_auth()
+    headers = {"X-Auth-Token": token}
+    r = _get_session().get(auth["services_url"], headers=headers,
+                           params={"type": service})
     if not r.ok:
         return None
     data = r.json()
@@ -83,12 +167,61 @@ def get_service_url(token, service):
 
     if not services_id:
         return
-    r = requests.get(ENDPOINTS_URL, headers=headers, params={"service_id": services_id})
+    r = _get_session().get(auth["endpoints_url"], headers=headers,
+                           params={"service_id": services_id})
     if not r.ok:
         return None
     data = r.json()
     if data["endpoints"]:
-        return data["endpoints"][0]["url"]
+        url = data["endpoints"][0]["url"]
+        _ENDPOINT_CACHE[service] = (time.time(), url)
+        return url
+
+
+def get_service_urls(token, services):
+    """Resolve endpoint URLs for several service types at once.
+
+    Fetches the service and endpoint catalogs once and resolves every
+    requested type from them, so N lookups cost two GETs instead of
+    2N. Cached entries are served from (and fresh ones stored in) the
+    endpoint cache. Returns a dict of service type to URL; types that
+    could not be resolved are absent.
+    """
+    urls = {}
+    missing = []
+    for service in services:
+        cached = _ENDPOINT_CACHE.get(service)
+        if cached and time.time() - cached[0] < _ENDPOINT_TTL:
+            urls[service] = cached[1]
+        else:
+            missing.append(service)
+    if not missing:
+        return urls
+
+    auth = _get_auth()
+    headers = {"X-Auth-Token": token}
+    r = _get_session().get(auth["services_url"], headers=headers)
+    if not r.ok:
+        return urls
+    wanted = set(missing)
+    service_ids = {}
+    for svc in r.json().get("services", []):
+        if svc["type"] in wanted and svc["type"] not in service_ids:
+            service_ids[svc["type"]] = svc["id"]
+    if not service_ids:
+        return urls
+
+    r = _get_session().get(auth["endpoints_url"], headers=headers)
+    if not r.ok:
+        return urls
+    type_by_id = {v: k for k, v in service_ids.items()}
+    now = time.time()
+    for endpoint in r.json().get("endpoints", []):
+        service = type_by_id.get(endpoint["service_id"])
+        if service and service not in urls:
+            urls[service] = endpoint["url"]
+            _ENDPOINT_CACHE[service] = (now, endpoint["url"])
+    return urls
 
 
 def get_image_url(token):
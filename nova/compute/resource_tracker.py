@@ -227,15 +227,20 @@ class ResourceTracker(object):
             "trait1:CUSTOM_CYBORG_CRYPTO": "required"}
         """
         # import pdb; pdb.set_trace()
-        for res, val in instance.flavor['extra_specs'].items():
-            m = XS_KEYPAT.match(res)
-            if not m:
-                continue
-            k, group, v = m.groups()
-            if not (v.startswith("CUSTOM_FPGA_") or v.startswith("CUSTOM_QAT_")
-                or v.startswith("CUSTOM_CYBORG_")):
-                continue
-            cyborg_resources[res] = val
+        # Cheapest probe first: most flavors carry no extra_specs at
+        # all, so find that out before scanning for accelerator keys.
+        extra_specs = instance.flavor['extra_specs']
+        if extra_specs:
+            for res, val in extra_specs.items():
+                m = XS_KEYPAT.match(res)
+                if not m:
+                    continue
+                k, group, v = m.groups()
+                if not (v.startswith("CUSTOM_FPGA_")
+                        or v.startswith("CUSTOM_QAT_")
+                        or v.startswith("CUSTOM_CYBORG_")):
+                    continue
+                cyborg_resources[res] = val
         hack_requests = {}
         hack_pci_requests = []
         pci_devices = []
@@ -22,6 +22,22 @@ from nova import rc_fields as fields
 _RC_TBL = models.ResourceClass.__table__
 _LOCKNAME = 'rc_cache'
 
+# Built once at import so every refresh reuses the same statement (and
+# SQLAlchemy's compiled-statement cache) instead of reconstructing the
+# select tree per call.
+_RC_SELECT_ALL = sa.select([_RC_TBL.c.id, _RC_TBL.c.name,
+                            _RC_TBL.c.updated_at, _RC_TBL.c.created_at])
+
+# The standard resource classes never change at runtime, so their rows
+# and both lookup directions are built once at import time and shared
+# by every cache instance.
+_STANDARDS = tuple({'id': rc_id, 'name': name,
+                    'updated_at': None, 'created_at': None}
+                   for rc_id, name
+                   in enumerate(fields.ResourceClass.STANDARD))
+_STD_BY_NAME = {std['name']: std for std in _STANDARDS}
+_STD_BY_ID = {std['id']: std for std in _STANDARDS}
+
 
 def raise_if_custom_resource_class_pre_v1_1(rc):
     """Raises ValueError if the supplied resource class identifier is
@@ -48,22 +64,27 @@ def _refresh_from_db(ctx, cache):
     :param cache: ResourceClassCache object to refresh.
     """
     with db_api.api_context_manager.reader.connection.using(ctx) as conn:
-        sel = sa.select([_RC_TBL.c.id, _RC_TBL.c.name, _RC_TBL.c.updated_at,
-                         _RC_TBL.c.created_at])
-        res = conn.execute(sel).fetchall()
-        cache.id_cache = {r[1]: r[0] for r in res}
-        cache.str_cache = {r[0]: r[1] for r in res}
-        cache.all_cache = {r[1]: r for r in res}
+        res = conn.execute(_RC_SELECT_ALL).fetchall()
+        id_cache = {}
+        str_cache = {}
+        all_cache = {}
+        for r in res:
+            rc_id, rc_name = r[0], r[1]
+            id_cache[rc_name] = rc_id
+            str_cache[rc_id] = rc_name
+            all_cache[rc_name] = r
+        cache.id_cache = id_cache
+        cache.str_cache = str_cache
+        cache.all_cache = all_cache
 
 
 class ResourceClassCache(object):
     """A cache of integer and string lookup values for resource classes."""
 
-    # List of dict of all standard resource classes, where every list item
-    # have a form {'id': <ID>, 'name': <NAME>}
-    STANDARDS = [{'id': fields.ResourceClass.STANDARD.index(s), 'name': s,
-                  'updated_at': None, 'created_at': None}
-                 for s in fields.ResourceClass.STANDARD]
+    # Tuple of dict of all standard resource classes, where every item
+    # have a form {'id': <ID>, 'name': <NAME>}; built once at module
+    # import and shared across instances.
+    STANDARDS = _STANDARDS
 
     def __init__(self, ctx):
         """Initialize the cache of resource class identifiers.
@@ -82,6 +103,17 @@ class ResourceClassCache(object):
             self.str_cache = {}
             self.all_cache = {}
 
+    def preload(self):
+        """Eagerly populate the cache of custom resource classes.
+
+        Loads every custom resource class in a single SELECT so that
+        subsequent id_from_string()/string_from_id() calls are pure
+        dict probes. Callers with a hot lookup path can invoke this at
+        startup instead of paying for the load on the first miss.
+        """
+        with lockutils.lock(_LOCKNAME):
+            _refresh_from_db(self.ctx, self)
+
     def id_from_string(self, rc_str):
         """Given a string representation of a resource class -- e.g. "DISK_GB"
         or "IRON_SILVER" -- return the integer code for the resource class. For
@@ -100,8 +132,9 @@ class ResourceClassCache(object):
                 either the standard classes or the DB.
         """
         # First check the standard resource classes
-        if rc_str in fields.ResourceClass.STANDARD:
-            return fields.ResourceClass.STANDARD.index(rc_str)
+        std = _STD_BY_NAME.get(rc_str)
+        if std is not None:
+            return std['id']
 
         with lockutils.lock(_LOCKNAME):
             if rc_str in self.id_cache:
@@ -125,11 +158,9 @@ class ResourceClassCache(object):
                  either the standard classes or the DB.
         """
         # First check the standard resource classes
-        if rc_str in fields.ResourceClass.STANDARD:
-            return {'id': fields.ResourceClass.STANDARD.index(rc_str),
-                    'name': rc_str,
-                    'updated_at': None,
-                    'created_at': None}
+        std = _STD_BY_NAME.get(rc_str)
+        if std is not None:
+            return std
 
         with lockutils.lock(_LOCKNAME):
             if rc_str in self.all_cache:
@@ -155,11 +186,10 @@ class ResourceClassCache(object):
         :raises `exception.ResourceClassNotFound` if rc_id cannot be found in
                 either the standard classes or the DB.
         """
-        # First check the fields.ResourceClass.STANDARD values
-        try:
-            return fields.ResourceClass.STANDARD[rc_id]
-        except IndexError:
-            pass
+        # First check the standard resource classes
+        std = _STD_BY_ID.get(rc_id)
+        if std is not None:
+            return std['name']
 
         with lockutils.lock(_LOCKNAME):
             if rc_id in self.str_cache:
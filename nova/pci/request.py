@@ -38,13 +38,11 @@
     product_id is "0442" or "0443".
     """
 
-import jsonschema
-from oslo_serialization import jsonutils
+from oslo_log import log as logging
 import re
 import six
 
 import nova.conf
-from nova.api.openstack.placement import lib as placement_lib
 from nova import exception
 from nova.i18n import _
 from nova.network import model as network_model
@@ -56,7 +54,12 @@ from nova.objects import fields
 
 XS_RES_PREFIX = 'resources'
 XS_TRAIT_PREFIX = 'trait'
-XS_KEYPAT = re.compile(r"^(%s)([1-9][0-9]*)?:(.*)$" % '|'.join((XS_RES_PREFIX, XS_TRAIT_PREFIX)))
+# The value alternation rejects anything but the Cyborg-managed custom
+# classes in the same C-level regex step, so no per-key startswith()
+# chain is needed after the match.
+XS_KEYPAT = re.compile(r"^(%s)([1-9][0-9]*)?:"
+                       r"(CUSTOM_(?:FPGA|QAT|CYBORG)_[A-Z0-9_]+)$"
+                       % '|'.join((XS_RES_PREFIX, XS_TRAIT_PREFIX)))
 
 PCI_NET_TAG = 'physical_network'
 PCI_DEVICE_TYPE_TAG = 'dev_type'
@@ -65,7 +68,21 @@ DEVICE_TYPE_FOR_VNIC_TYPE = {
     network_model.VNIC_TYPE_DIRECT_PHYSICAL: obj_fields.PciDeviceType.SRIOV_PF
 }
 
+# Deployable type reported by a cyborg claim to the PCI dev_type tag.
+DEVICE_TYPE_FOR_CLAIM_TYPE = {
+    "pf": "Type-PF",
+    "vf": "Type-VF",
+}
+
+# Resource class suffix to the PCI dev_type tag, for requests built
+# straight from the flavor's request groups.
+DEVICE_TYPE_FOR_CLASS_SUFFIX = {
+    "_PF": "Type-PF",
+    "_VF": "Type-VF",
+}
+
 CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
 
 _ALIAS_CAP_TYPE = ['pci']
 _ALIAS_SCHEMA = {
@@ -103,6 +120,41 @@ _ALIAS_SCHEMA = {
     "required": ["name"],
 }
 
+# Compiled validator for _ALIAS_SCHEMA. Built lazily (jsonschema is a
+# deferred import) and then reused, so the schema is only resolved once
+# instead of per validated alias.
+_ALIAS_VALIDATOR = None
+
+# Parsed alias cache for _get_alias_from_config(), keyed on the raw
+# CONF.pci.alias value so that a configuration change invalidates it.
+_ALIASES_CACHE = {'key': None, 'val': None}
+
+# Matches one "name:count" segment of a "name_x:count, name_y:count"
+# extra spec; names may contain embedded spaces. Anchored so that a
+# malformed segment is rejected rather than partially parsed.
+_ALIAS_SPEC_RE = re.compile(r'\s*([^:,]+?)\s*:\s*(\d+)\s*$')
+
+# Memoized XS_KEYPAT results. Flavors repeat the same extra_spec keys
+# boot after boot, so each distinct key pays for the regex only once.
+# The cache is emptied should it ever grow past _XS_KEY_CACHE_MAX keys.
+_XS_KEY_CACHE = {}
+_XS_KEY_CACHE_MAX = 1024
+
+
+def _match_extra_spec_key(key):
+    """Return XS_KEYPAT match groups for key, or None if it is not an
+    accelerator resources/trait key. Results are memoized.
+    """
+    try:
+        return _XS_KEY_CACHE[key]
+    except KeyError:
+        m = XS_KEYPAT.match(key)
+        groups = m.groups() if m else None
+        if len(_XS_KEY_CACHE) >= _XS_KEY_CACHE_MAX:
+            _XS_KEY_CACHE.clear()
+        _XS_KEY_CACHE[key] = groups
+        return groups
+
 
 def _get_alias_from_config():
     """Parse and validate PCI aliases from the nova config.
@@ -114,12 +166,26 @@ def _get_alias_from_config():
     :raises: exception.PciInvalidAlias if two aliases with the same name have
         different device types or different NUMA policies.
     """
+    # Deferred: only needed when a PCI alias is actually configured, and
+    # the parsed result is cached, so keep them off module import.
+    global _ALIAS_VALIDATOR
+
+    import jsonschema
+    from oslo_serialization import jsonutils
+
     jaliases = CONF.pci.alias
+    cache_key = tuple(jaliases)
+    if cache_key == _ALIASES_CACHE['key']:
+        return _ALIASES_CACHE['val']
+
+    if _ALIAS_VALIDATOR is None:
+        _ALIAS_VALIDATOR = jsonschema.Draft4Validator(_ALIAS_SCHEMA)
+
     aliases = {}  # map alias name to alias spec list
     try:
         for jsonspecs in jaliases:
             spec = jsonutils.loads(jsonspecs)
-            jsonschema.validate(spec, _ALIAS_SCHEMA)
+            _ALIAS_VALIDATOR.validate(spec)
 
             name = spec.pop('name').strip()
             numa_policy = spec.pop('numa_policy', None)
@@ -150,6 +216,8 @@ def _get_alias_from_config():
     except Exception as exc:
         raise exception.PciInvalidAlias(reason=six.text_type(exc))
 
+    _ALIASES_CACHE['key'] = cache_key
+    _ALIASES_CACHE['val'] = aliases
     return aliases
 
 
@@ -158,8 +226,12 @@ def _translate_alias_to_requests(alias_spec):
     pci_aliases = _get_alias_from_config()
 
     pci_requests = []
-    for name, count in [spec.split(':') for spec in alias_spec.split(',')]:
-        name = name.strip()
+    for spec in alias_spec.split(','):
+        m = _ALIAS_SPEC_RE.match(spec)
+        if not m:
+            reason = _("Invalid alias spec '%s'") % spec
+            raise exception.PciInvalidAlias(reason=reason)
+        name, count = m.groups()
         if name not in pci_aliases:
             raise exception.PciRequestAliasNotDefined(alias=name)
 
@@ -219,13 +291,20 @@ def get_pci_requests_from_flavor(flavor):
     :raises: exception.PciInvalidAlias if the configuration contains invalid
         aliases.
     """
+    # Deferred so that processes never touching PCI/accelerator flavors
+    # do not pay for the placement library at import time.
+    from nova.api.openstack.placement import lib as placement_lib
+
     _rg_by_id = {}
 
     def get_request_group(ident):
-        if ident not in _rg_by_id:
+        # Called once per matched extra_spec; a single get() avoids
+        # hashing the ident twice on the common hit path.
+        rq_grp = _rg_by_id.get(ident)
+        if rq_grp is None:
             rq_grp = placement_lib.RequestGroup(use_same_provider=bool(ident))
             _rg_by_id[ident] = rq_grp
-        return _rg_by_id[ident]
+        return rq_grp
 
     def _add_resource(groupid, rclass, amount):
         # Validate the class.
@@ -261,8 +340,8 @@ def get_pci_requests_from_flavor(flavor):
         pci_requests = _translate_alias_to_requests(
             flavor['extra_specs']['pci_passthrough:alias'])
     elif ('extra_specs' in flavor):
-        print("*" * 80)
-        print(flavor['extra_specs'])
+        LOG.debug("Looking for accelerator specs in %s",
+                  flavor['extra_specs'])
         payload_example = {
             "instance_uuid": "4047d422-5d2f-432c-b87f-5e1749e95ee6",
             "host": "cyborg-1",
@@ -273,16 +352,14 @@ def get_pci_requests_from_flavor(flavor):
             "trait1:CUSTOM_CYBORG_CRYPTO": "required"}
 
         cyborg_resources = {"instance_uuid": None, "host": None}
+        _match = _match_extra_spec_key
         for res, val in flavor['extra_specs'].items():
-            m = XS_KEYPAT.match(res)
-            if not m:
-                continue
-            k, group, v = m.groups()
-            if (not v.startswith("CUSTOM_FPGA_") and not v.startswith("CUSTOM_QAT_")
-                and not v.startswith("CUSTOM_CYBORG_")):
+            groups = _match(res)
+            if groups is None:
                 continue
+            k, group, v = groups
             if k == XS_RES_PREFIX:
-                ret._add_resource(group, v, val)
+                _add_resource(group, v, val)
 
             # Process "trait[$N]"
             elif k == XS_TRAIT_PREFIX:
@@ -292,35 +369,49 @@ def get_pci_requests_from_flavor(flavor):
         if len(cyborg_resources) > 2:
             from nova.clients.token import token
             from nova.clients.cyborg import cyborg
-            tok, data = token.get_token()
+            from nova import utils as nova_utils
+            # Spawned only once the claim gate has been passed, so the
+            # keystone round-trip is never issued for a token nobody
+            # consumes; it overlaps the config lookups below.
+            token_thread = nova_utils.spawn(token.get_token)
             cy = CONF.get("cyborg")
             url = cy.get("url")
+            tok, data = token_thread.wait()
             # import pdb; pdb.set_trace()
             r = cyborg.claim_fpgas(tok, cyborg_resources, url=url)
             if r and r.get("deployables", {}).get("pcie_address"):
-                for i in r["deployables"]:
+                # Validate the response once, up front, instead of
+                # letting each loop iteration trip over a missing key.
+                missing = [key for key in ("vendor", "board", "type", "name")
+                           if key not in r]
+                if missing:
+                    LOG.warning(
+                        "Ignoring malformed cyborg claim response, "
+                        "missing %(keys)s: %(resp)s",
+                        {"keys": missing, "resp": r})
+                else:
+                    # vendor/board/type/name describe the claim, not the
+                    # deployable, so compute them once outside the loop.
                     vendor = r["vendor"][2:]
                     product_id = r["board"][2:]
-                    dev_type = 'Type-PF' if r["type"] == "pf" else ""
-                    dev_type = 'Type-VF' if r["type"] == "vf" else dev_type
-                    request = objects.InstancePCIRequest(
-                        count=1,
-                        spec=[{'vendor_id': vendor, 'product_id': product_id, 'dev_type': dev_type}],
-                        alias_name=r["name"])
-                    pci_requests.append(request)
-
-        for k, v in _rg_by_id:
-            traits = ",".join(v.required_traits)
-            for res, num in v.resources:
-                dev_type = 'Type-PF' if res.endswith["_PF"] else ""
-                dev_type = 'Type-VF' if res.endswith["_PF"] else dev_type
-                request = objects.InstancePCIRequest(
+                    dev_type = DEVICE_TYPE_FOR_CLAIM_TYPE.get(r["type"], "")
+                    alias_name = r["name"]
+                    spec = [{'vendor_id': vendor, 'product_id': product_id,
+                             'dev_type': dev_type}]
+                    for i in r["deployables"]:
+                        pci_requests.append(objects.InstancePCIRequest(
+                            count=1, spec=spec, alias_name=alias_name))
+
+        for gid, grp in _rg_by_id.items():
+            traits = ",".join(grp.required_traits)
+            for res, num in grp.resources.items():
+                dev_type = DEVICE_TYPE_FOR_CLASS_SUFFIX.get(res[-3:], "")
+                pci_requests.append(objects.InstancePCIRequest(
                     count=num,
-                    spec=[{'vendor_id': res, 'product_id': traits, 'dev_type': dev_type}],
-                    alias_name=r["name"])
-                pci_requests.append(request)
+                    spec=[{'vendor_id': res, 'product_id': traits,
+                           'dev_type': dev_type}],
+                    alias_name=res))
 
-        print("=" * 80)
-        print(pci_requests)
+        LOG.debug("Accelerator PCI requests: %s", pci_requests)
 
     return objects.InstancePCIRequests(requests=pci_requests)
@@ -48,6 +48,10 @@ class ResourceClass(fields.StringField):
                 NUMA_SOCKET, NUMA_CORE, NUMA_THREAD, NUMA_MEMORY_MB,
                 IPV4_ADDRESS, VGPU, VGPU_DISPLAY_HEAD)
 
+    # Set form of STANDARD for O(1) membership tests; the tuple above
+    # remains authoritative for ordering (and thus the integer ids).
+    STANDARD_SET = frozenset(STANDARD)
+
     # This is the set of standard resource classes that existed before
     # we opened up for custom resource classes in version 1.1 of various
     # objects in nova/objects/resource_provider.py
@@ -10,8 +10,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
 import datetime
-import mock
+import types
 
 from oslo_utils import timeutils
 
@@ -22,39 +23,65 @@ from nova import test
 from nova.tests import fixtures
 
 
+@contextlib.contextmanager
+def count_refresh_calls():
+    """Counts invocations of rc_cache._refresh_from_db().
+
+    The cache executes a statement prebuilt at module import, so
+    sqlalchemy.select is never called at lookup time and counting it
+    would observe nothing; _refresh_from_db is what fires exactly once
+    per DB hit. A minimal wrapper is also much cheaper than mock.patch
+    for a bare "was it called" assertion. Yields a single-element list
+    holding the call count.
+    """
+    original = rc_cache._refresh_from_db
+    calls = [0]
+
+    def wrapped(*args, **kwargs):
+        calls[0] += 1
+        return original(*args, **kwargs)
+
+    rc_cache._refresh_from_db = wrapped
+    try:
+        yield calls
+    finally:
+        rc_cache._refresh_from_db = original
+
+
 class TestResourceClassCache(test.TestCase):
 
     def setUp(self):
         super(TestResourceClassCache, self).setUp()
         self.db = self.useFixture(fixtures.Database(database='api'))
-        self.context = mock.Mock()
-        sess_mock = mock.Mock()
-        sess_mock.connection.side_effect = self.db.get_engine().connect
-        self.context.session = sess_mock
-
-    @mock.patch('sqlalchemy.select')
-    def test_rc_cache_std_no_db(self, sel_mock):
+        # The cache only ever needs ctx.session.connection(), so a
+        # plain namespace handing out real engine connections is enough
+        # and avoids building a Mock graph for every test.
+        self.context = types.SimpleNamespace(
+            session=types.SimpleNamespace(
+                connection=self.db.get_engine().connect))
+
+    def test_rc_cache_std_no_db(self):
         """Test that looking up either an ID or a string in the resource class
         cache for a standardized resource class does not result in a DB
         call.
         """
         cache = rc_cache.ResourceClassCache(self.context)
 
-        self.assertEqual('VCPU', cache.string_from_id(0))
-        self.assertEqual('MEMORY_MB', cache.string_from_id(1))
-        self.assertEqual(0, cache.id_from_string('VCPU'))
-        self.assertEqual(1, cache.id_from_string('MEMORY_MB'))
+        with count_refresh_calls() as calls:
+            self.assertEqual('VCPU', cache.string_from_id(0))
+            self.assertEqual('MEMORY_MB', cache.string_from_id(1))
+            self.assertEqual(0, cache.id_from_string('VCPU'))
+            self.assertEqual(1, cache.id_from_string('MEMORY_MB'))
 
-        self.assertFalse(sel_mock.called)
+        self.assertEqual(0, calls[0])
 
     def test_standards(self):
         cache = rc_cache.ResourceClassCache(self.context)
         standards = cache.STANDARDS
 
         self.assertEqual(len(standards), len(fields.ResourceClass.STANDARD))
-        names = (rc['name'] for rc in standards)
-        for name in fields.ResourceClass.STANDARD:
-            self.assertIn(name, names)
+        names = {rc['name'] for rc in standards}
+        self.assertEqual(fields.ResourceClass.STANDARD_SET, names)
 
         cache = rc_cache.ResourceClassCache(self.context)
         standards2 = cache.STANDARDS
@@ -104,10 +131,10 @@ class TestResourceClassCache(test.TestCase):
         self.assertEqual(1001, cache.id_from_string('IRON_NFV'))
 
         # Try same again and verify we don't hit the DB.
-        with mock.patch('sqlalchemy.select') as sel_mock:
+        with count_refresh_calls() as calls:
             self.assertEqual('IRON_NFV', cache.string_from_id(1001))
             self.assertEqual(1001, cache.id_from_string('IRON_NFV'))
-            self.assertFalse(sel_mock.called)
+        self.assertEqual(0, calls[0])
 
         # Verify all fields available from all_from_string
         iron_nfv_class = cache.all_from_string('IRON_NFV')
@@ -95,6 +95,19 @@ class AliasTestCase(test.NoDBTestCase):
             }])
         self.assertEqual(expected_result, result['QuicAssist'])
 
+    def test_alias_cached_while_config_unchanged(self):
+        self.flags(alias=[_fake_alias1], group='pci')
+        result = request._get_alias_from_config()
+        # An unchanged CONF.pci.alias is served straight from the cache.
+        self.assertIs(result, request._get_alias_from_config())
+
+        # Changing the option invalidates the cache and the new aliases
+        # are parsed.
+        self.flags(alias=[_fake_alias1, _fake_alias3], group='pci')
+        result2 = request._get_alias_from_config()
+        self.assertIsNot(result, result2)
+        self.assertEqual(['IntelNIC', 'QuicAssist'], sorted(result2))
+
     def test_invalid_type_alias(self):
         self.flags(alias=[_fake_alias2], group='pci')
         self.assertRaises(exception.PciInvalidAlias,
@@ -230,6 +243,13 @@ class AliasTestCase(test.NoDBTestCase):
                           request._translate_alias_to_requests,
                           "QuicAssistX : 3")
 
+    def test_alias_2_request_invalid_spec(self):
+        self.flags(alias=[_fake_alias1, _fake_alias3], group='pci')
+        for alias_spec in ("myalias", "a:2x", "QuicAssist:1,"):
+            self.assertRaises(exception.PciInvalidAlias,
+                              request._translate_alias_to_requests,
+                              alias_spec)
+
     def test_get_pci_requests_from_flavor(self):
         self.flags(alias=[_fake_alias1, _fake_alias3], group='pci')
         expect_request = [